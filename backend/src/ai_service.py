@@ -2,12 +2,14 @@ import os
 import json
 import openai
 from processor import SewerDataProcessor
+from hot_tier import InspectionHotTier
 
 class SewerAIService:
     # Initialize OpenAI client and data processor
-    def __init__(self):
+    def __init__(self, hot_tier: InspectionHotTier = None):
         openai.api_key = os.getenv('OPENAI_API_KEY')
-        self.processor = SewerDataProcessor()
+        self.processor = hot_tier.processor if hot_tier else SewerDataProcessor()
+        self.hot_tier = hot_tier or InspectionHotTier(self.processor)
         
     # Main entry point for processing natural language queries
     def analyze_query(self, user_query: str) -> dict:
@@ -103,17 +105,20 @@ class SewerAIService:
         inspections = []
         count = 0
         
-        for record in self.processor.stream_all_files():
-            if record.get('inspection_type', '').lower() == 'emergency':
-                inspections.append([
-                    record.get('location', {}).get('city', 'Unknown'),
-                    record.get('location', {}).get('state', 'Unknown'),
-                    record.get('inspection_score', 'N/A'),
-                    record.get('crew', {}).get('contractor', 'Unknown')
-                ])
-                count += 1
-                if count >= 20:  # Limit for performance
-                    break
+        for filename in self.processor.files:
+            for record in self.hot_tier.stream(filename):
+                if (record.inspection_type or '').lower() == 'emergency':
+                    inspections.append([
+                        record.city if record.city is not None else 'Unknown',
+                        record.state if record.state is not None else 'Unknown',
+                        record.score if record.score is not None else 'N/A',
+                        record.contractor if record.contractor is not None else 'Unknown'
+                    ])
+                    count += 1
+                    if count >= 20:  # Limit for performance
+                        break
+            if count >= 20:
+                break
         
         table_data = {
             "columns": ["City", "State", "Score", "Contractor"],
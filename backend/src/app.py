@@ -1,10 +1,14 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+import atexit
 import logging
 import os
+import signal
+import sys
 from dotenv import load_dotenv
 from processor import SewerDataProcessor
 from ai_service import SewerAIService
+from hot_tier import InspectionHotTier
 
 # Load environment variables
 load_dotenv()
@@ -17,7 +21,12 @@ CORS(app)
 
 # Initialize services
 processor = SewerDataProcessor()
-ai_service = SewerAIService()
+hot_tier = InspectionHotTier(processor)
+# Under the debug reloader this module also runs in the watcher parent, which never serves requests
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    hot_tier.prewarm()
+    atexit.register(hot_tier.save_snapshot)
+ai_service = SewerAIService(hot_tier)
 
 # API overview and available endpoints
 @app.route('/')
@@ -35,6 +44,7 @@ def home():
             "GET /api/cities", 
             "GET /api/inspection-types",
             "GET /api/stats",
+            "GET /api/hot-tier - In-memory cache usage",
             "POST /api/chat"
         ]
     })
@@ -117,17 +127,17 @@ def get_inspections():
     if file_filter:
         target_filename = f"sewer-inspections-{file_filter}.jsonl"
         if target_filename in processor.files:
-            file_iterator = [processor.stream_file(target_filename)]
+            target_files = [target_filename]
         else:
             return jsonify({'error': f'File {file_filter} not available. Available: part1, part2, part5'}), 400
     else:
-        file_iterator = [processor.stream_file(f) for f in processor.files]
+        target_files = processor.files
     
-    # Process files
-    for file_stream in file_iterator:
-        for record in file_stream:
+    # Process files, served from the hot tier until its cached prefix runs out
+    for filename in target_files:
+        for record in hot_tier.stream(filename):
             # Apply filters
-            if city and record.get('location', {}).get('city') != city:
+            if city and record.city != city:
                 continue
             
             # Handle offset (skip records)
@@ -136,13 +146,13 @@ def get_inspections():
                 continue
                 
             inspections.append({
-                'id': record.get('id'),
-                'type': record.get('inspection_type'),
-                'city': record.get('location', {}).get('city'),
-                'state': record.get('location', {}).get('state'),
-                'score': record.get('inspection_score'),
-                'contractor': record.get('crew', {}).get('contractor'),
-                'date': record.get('timestamp_utc', '').split('T')[0],  # Just date part
+                'id': record.id,
+                'type': record.inspection_type,
+                'city': record.city,
+                'state': record.state,
+                'score': record.score,
+                'contractor': record.contractor,
+                'date': record.date,  # Just date part
                 'source_file': file_filter if file_filter else 'multiple'
             })
             
@@ -226,6 +236,12 @@ def get_stats():
         'sample_size': 200
     })
 
+# Hot tier memory usage and per-record cost
+@app.route('/api/hot-tier')
+def get_hot_tier():
+    """GET /api/hot-tier - In-memory cache usage and per-record memory cost"""
+    return jsonify(hot_tier.stats())
+
 if __name__ == '__main__':
     # Check for OpenAI API key
     if not os.getenv('OPENAI_API_KEY'):
@@ -234,5 +250,8 @@ if __name__ == '__main__':
     else:
         print("✅ OpenAI API key loaded")
     
+    # SIGTERM skips atexit by default; exit normally so the hot tier snapshot is saved
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     print("🚀 Starting Sewer AI API on port 5001...")
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
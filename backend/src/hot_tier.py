@@ -0,0 +1,400 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import threading
+from itertools import chain, islice
+from typing import Iterator, Dict, List, Optional
+import logging
+from processor import SewerDataProcessor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MB = 64
+DEFAULT_SNAPSHOT_PATH = os.path.join(BACKEND_DIR, 'hot_tier_snapshot.jsonl')
+# Bump whenever InspectionRecord's fields or the snapshot layout change
+SNAPSHOT_VERSION = 2
+# Records measured when estimating what the same data would cost as dicts
+DICT_COST_SAMPLE = 1000
+
+
+# Compact, fixed-layout copy of the fields the listing and emergency views read
+# __slots__ drops the per-instance __dict__; repeated strings are shared through the tier's pool
+class InspectionRecord:
+    __slots__ = ('id', 'inspection_type', 'city', 'state', 'score', 'contractor', 'date')
+    POOLED_FIELDS = ('inspection_type', 'city', 'state', 'contractor', 'date')
+
+    def __init__(self, id, inspection_type, city, state, score, contractor, date):
+        self.id = id
+        self.inspection_type = inspection_type
+        self.city = city
+        self.state = state
+        self.score = score
+        self.contractor = contractor
+        self.date = date
+
+    @classmethod
+    def from_raw(cls, record: Dict) -> 'InspectionRecord':
+        """Project a parsed S3 record down to the cached fields"""
+        location = record.get('location', {})
+        return cls(
+            id=record.get('id'),
+            inspection_type=record.get('inspection_type'),
+            city=location.get('city'),
+            state=location.get('state'),
+            score=record.get('inspection_score'),
+            contractor=record.get('crew', {}).get('contractor'),
+            date=record.get('timestamp_utc', '').split('T')[0]
+        )
+
+    def to_dict(self) -> Dict:
+        """Flat dict used for the local snapshot file"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+# Strings shared through the pool are accounted once in _pool_bytes, not per record
+def _record_cost(record: InspectionRecord) -> int:
+    return sys.getsizeof(record) + sum(
+        sys.getsizeof(value) for value in (record.id, record.score) if value is not None
+    )
+
+
+# Cost of the same fields as a flat dict, where every record owns its own value objects
+def _field_dict_cost(record: InspectionRecord) -> int:
+    as_dict = record.to_dict()
+    return sys.getsizeof(as_dict) + sum(
+        sys.getsizeof(value) for value in as_dict.values() if value is not None
+    )
+
+
+# Recursively measure a parsed JSON record, i.e. what every request used to build per record
+def _deep_sizeof(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += _deep_sizeof(key) + _deep_sizeof(item)
+    elif isinstance(value, list):
+        for item in value:
+            size += _deep_sizeof(item)
+    return size
+
+
+def _budget_from_env() -> int:
+    value = os.getenv('HOT_TIER_BUDGET_MB', DEFAULT_BUDGET_MB)
+    try:
+        budget_mb = float(value)
+    except ValueError:
+        logger.warning(f"Invalid HOT_TIER_BUDGET_MB={value!r}, using {DEFAULT_BUDGET_MB}MB")
+        budget_mb = DEFAULT_BUDGET_MB
+    return int(budget_mb * 1024 * 1024)
+
+
+class InspectionHotTier:
+    # Keeps the head of each S3 file in RAM, since listings and emergency lookups read from the start
+    # Each file's cache is a contiguous prefix, so offset/limit pages can be served without S3
+    # A file may grow past its share of the budget while there is room, but a file under its share
+    # evicts the tails of files over theirs, so a long scan of one file cannot push out the others
+    def __init__(self, processor: SewerDataProcessor, budget_bytes: int = None, snapshot_path: str = None):
+        self.processor = processor
+        self.budget_bytes = budget_bytes if budget_bytes is not None else _budget_from_env()
+        self.file_budget_bytes = self.budget_bytes // max(len(processor.files), 1)
+        # Relative paths are resolved against backend/, matching the default location
+        self.snapshot_path = os.path.join(BACKEND_DIR, snapshot_path or os.getenv('HOT_TIER_SNAPSHOT', DEFAULT_SNAPSHOT_PATH))
+
+        self._lock = threading.Lock()
+        self._prefixes: Dict[str, List[InspectionRecord]] = {f: [] for f in processor.files}
+        # Record bytes plus the pool strings each file introduced
+        self._file_bytes: Dict[str, int] = {f: 0 for f in processor.files}
+        # string -> [string, refcount, owning file]; strings only held by evicted records are released
+        self._pool: Dict[str, list] = {}
+        self._pool_bytes = 0
+        self._record_bytes = 0
+        self._raw_dict_bytes = 0
+        self._raw_dict_samples = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def _intern(self, value, filename: str):
+        if not isinstance(value, str):
+            return value
+        entry = self._pool.get(value)
+        if entry is None:
+            size = sys.getsizeof(value)
+            entry = [value, 0, filename]
+            self._pool[value] = entry
+            self._pool_bytes += size
+            self._file_bytes[filename] += size
+        entry[1] += 1
+        return entry[0]
+
+    def _release(self, value):
+        if not isinstance(value, str):
+            return
+        entry = self._pool.get(value)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            size = sys.getsizeof(value)
+            del self._pool[value]
+            self._pool_bytes -= size
+            self._file_bytes[entry[2]] -= size
+
+    # Bytes the record would add, including pool strings it would be first to hold
+    def _admission_cost(self, record: InspectionRecord, cost: int) -> int:
+        new_strings = {
+            value for value in (getattr(record, field) for field in InspectionRecord.POOLED_FIELDS)
+            if isinstance(value, str) and value not in self._pool
+        }
+        return cost + sum(sys.getsizeof(value) for value in new_strings)
+
+    # Only appends when position extends the prefix, so concurrent streams cannot leave gaps
+    # Room is made before the append, so a record is never evicted right after being cached
+    def _append(self, filename: str, position: int, record: InspectionRecord) -> bool:
+        cost = _record_cost(record)
+        with self._lock:
+            if len(self._prefixes[filename]) != position:
+                return False
+
+            while True:
+                needed = self._admission_cost(record, cost)
+                if self._pool_bytes + self._record_bytes + needed <= self.budget_bytes:
+                    break
+                victims = [
+                    f for f, size in self._file_bytes.items()
+                    if f != filename and size > self.file_budget_bytes and self._prefixes[f]
+                ]
+                if self._file_bytes[filename] + needed > self.file_budget_bytes or not victims:
+                    self.rejected += 1
+                    return False
+                self._evict_tail(max(victims, key=lambda f: self._file_bytes[f]))
+
+            for field in InspectionRecord.POOLED_FIELDS:
+                setattr(record, field, self._intern(getattr(record, field), filename))
+            self._prefixes[filename].append(record)
+            self._file_bytes[filename] += cost
+            self._record_bytes += cost
+            return True
+
+    def _evict_tail(self, filename: str):
+        record = self._prefixes[filename].pop()
+        cost = _record_cost(record)
+        self._file_bytes[filename] -= cost
+        self._record_bytes -= cost
+        for field in InspectionRecord.POOLED_FIELDS:
+            self._release(getattr(record, field))
+        self.evictions += 1
+
+    def stream(self, filename: str) -> Iterator[InspectionRecord]:
+        """Yield compact records for a file, from RAM first and then read-through from S3"""
+        position = 0
+        while True:
+            with self._lock:
+                prefix = self._prefixes[filename]
+                record = prefix[position] if position < len(prefix) else None
+                if record is not None:
+                    self.hits += 1
+            if record is None:
+                break
+            yield record
+            position += 1
+
+        logger.info(f"Hot tier exhausted for {filename} at {position} records, reading through from S3")
+
+        cached = position
+        skipped = 0
+        for raw in self.processor.stream_file(filename):
+            if skipped < cached:
+                skipped += 1
+                continue
+            # Unlocked read is fine: at worst a few extra records get measured and dropped
+            raw_cost = _deep_sizeof(raw) if self._raw_dict_samples < DICT_COST_SAMPLE else None
+            record = InspectionRecord.from_raw(raw)
+            with self._lock:
+                self.misses += 1
+                if raw_cost is not None and self._raw_dict_samples < DICT_COST_SAMPLE:
+                    self._raw_dict_bytes += raw_cost
+                    self._raw_dict_samples += 1
+            self._append(filename, position, record)
+            yield record
+            position += 1
+
+    def fill(self, records_per_file: int = None) -> int:
+        """Read the head of each file from S3 until its share of the budget is used; returns records cached"""
+        for filename in self.processor.files:
+            for position, _ in enumerate(self.stream(filename)):
+                with self._lock:
+                    cached = position < len(self._prefixes[filename])
+                    full = self._file_bytes[filename] >= self.file_budget_bytes
+                if not cached or full or (records_per_file and position + 1 >= records_per_file):
+                    break
+
+        with self._lock:
+            return sum(len(prefix) for prefix in self._prefixes.values())
+
+    def _read_snapshot_header(self, line: str) -> bool:
+        try:
+            header = json.loads(line)
+        except json.JSONDecodeError:
+            return False
+        if not (
+            isinstance(header, dict)
+            and header.get('snapshot_version') == SNAPSHOT_VERSION
+            and header.get('fields') == list(InspectionRecord.__slots__)
+        ):
+            return False
+
+        raw_bytes, raw_samples = header.get('raw_dict_bytes'), header.get('raw_dict_samples')
+        if isinstance(raw_bytes, int) and isinstance(raw_samples, int) and raw_samples > 0:
+            with self._lock:
+                self._raw_dict_bytes = raw_bytes
+                self._raw_dict_samples = raw_samples
+        return True
+
+    def prewarm(self) -> int:
+        """Load the local snapshot into RAM; returns the number of records cached afterwards"""
+        if not os.path.exists(self.snapshot_path):
+            logger.info(f"No hot tier snapshot at {self.snapshot_path}, starting cold")
+            return 0
+
+        fields = set(InspectionRecord.__slots__)
+        # Files whose snapshot had a bad or rejected line; later lines would no longer be contiguous
+        stopped = set()
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                if not self._read_snapshot_header(f.readline()):
+                    logger.warning(f"Discarding hot tier snapshot {self.snapshot_path}: missing or outdated header")
+                    return 0
+
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        # The owning file is unknown here; its next line fails the position check
+                        logger.warning(f"Skipping invalid snapshot line: {e}")
+                        continue
+                    if not isinstance(entry, dict):
+                        logger.warning("Skipping snapshot line that is not a record")
+                        continue
+
+                    filename = entry.pop('file', None)
+                    position = entry.pop('position', None)
+                    if filename not in self._prefixes or filename in stopped:
+                        continue
+                    if (
+                        set(entry) != fields
+                        or position != len(self._prefixes[filename])
+                        or not self._append(filename, position, InspectionRecord(**entry))
+                    ):
+                        logger.warning(f"Stopping prewarm of {filename} at record {len(self._prefixes[filename])}")
+                        stopped.add(filename)
+        except OSError as e:
+            logger.error(f"Error reading hot tier snapshot {self.snapshot_path}: {e}")
+
+        # Later files may evict the tail of earlier ones above their share, so count what stayed
+        with self._lock:
+            loaded = sum(len(prefix) for prefix in self._prefixes.values())
+
+        logger.info(f"Prewarmed hot tier with {loaded} records from {self.snapshot_path}")
+        return loaded
+
+    def save_snapshot(self) -> int:
+        """Write the cached prefixes to the local snapshot; returns the number of records written"""
+        with self._lock:
+            entries = [(filename, list(prefix)) for filename, prefix in self._prefixes.items()]
+            header = {
+                'snapshot_version': SNAPSHOT_VERSION,
+                'fields': list(InspectionRecord.__slots__),
+                'raw_dict_bytes': self._raw_dict_bytes,
+                'raw_dict_samples': self._raw_dict_samples
+            }
+
+        written = 0
+        tmp_path = None
+        try:
+            # Per-process temp file, so concurrent saves never write into the same file
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(self.snapshot_path),
+                                             prefix=f"{os.path.basename(self.snapshot_path)}.",
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                f.write(json.dumps(header) + '\n')
+                for filename, prefix in entries:
+                    for position, record in enumerate(prefix):
+                        f.write(json.dumps({'file': filename, 'position': position, **record.to_dict()}) + '\n')
+                        written += 1
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.error(f"Error saving hot tier snapshot {self.snapshot_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return 0
+
+        logger.info(f"Saved {written} hot tier records to {self.snapshot_path}")
+        return written
+
+    def stats(self) -> Dict:
+        """Memory usage and per-record cost of the compact layout against dict representations
+
+        raw_dict_bytes_per_record is the full parsed S3 record, as built before the tier existed;
+        field_dict_bytes_per_record is a flat dict of only the cached fields.
+        """
+        with self._lock:
+            records = sum(len(prefix) for prefix in self._prefixes.values())
+            records_per_file = {f: len(prefix) for f, prefix in self._prefixes.items()}
+            used_bytes = self._pool_bytes + self._record_bytes
+            pool_bytes = self._pool_bytes
+            interned_strings = len(self._pool)
+            raw_per_record = self._raw_dict_bytes / self._raw_dict_samples if self._raw_dict_samples else None
+            hits, misses, rejected, evictions = self.hits, self.misses, self.rejected, self.evictions
+            sample = list(islice(chain.from_iterable(self._prefixes.values()), DICT_COST_SAMPLE))
+
+        compact_per_record: Optional[float] = used_bytes / records if records else None
+        field_per_record: Optional[float] = sum(_field_dict_cost(r) for r in sample) / len(sample) if sample else None
+
+        def ratio(dict_per_record):
+            return round(dict_per_record / compact_per_record, 1) if compact_per_record and dict_per_record else None
+
+        return {
+            'records': records,
+            'records_per_file': records_per_file,
+            'budget_bytes': self.budget_bytes,
+            'file_budget_bytes': self.file_budget_bytes,
+            'used_bytes': used_bytes,
+            'string_pool_bytes': pool_bytes,
+            'interned_strings': interned_strings,
+            'bytes_per_record': round(compact_per_record, 1) if compact_per_record else None,
+            'raw_dict_bytes_per_record': round(raw_per_record, 1) if raw_per_record else None,
+            'field_dict_bytes_per_record': round(field_per_record, 1) if field_per_record else None,
+            'compression_ratio_vs_raw': ratio(raw_per_record),
+            'compression_ratio_vs_fields': ratio(field_per_record),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+            'rejected': rejected,
+            'evictions': evictions
+        }
+
+
+# Build or refresh the snapshot ahead of time, e.g. before starting a server that is stopped with SIGTERM
+def main():
+    parser = argparse.ArgumentParser(description="Build the hot tier snapshot from S3")
+    parser.add_argument('--records-per-file', type=int, default=None,
+                        help="Stop each file after this many records (default: its share of the budget)")
+    args = parser.parse_args()
+
+    hot_tier = InspectionHotTier(SewerDataProcessor())
+    hot_tier.prewarm()
+    hot_tier.fill(args.records_per_file)
+    hot_tier.save_snapshot()
+    print(json.dumps(hot_tier.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-memory hot tier
+Uses a fake processor, so no S3 access is needed
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from hot_tier import InspectionHotTier, InspectionRecord, SNAPSHOT_VERSION
+
+
+class FakeProcessor:
+    def __init__(self, files=('a', 'b'), records_per_file=10):
+        self.files = list(files)
+        self.records_per_file = records_per_file
+
+    def stream_file(self, filename):
+        for i in range(self.records_per_file):
+            yield {
+                'id': f'{filename}{i}',
+                'inspection_type': 'Emergency' if i % 3 == 0 else 'Routine',
+                'location': {'city': f'City{i % 4}', 'state': 'IL', 'district': 'North'},
+                'inspection_score': i,
+                'crew': {'contractor': 'Acme', 'size': 3},
+                'equipment': {'type': 'Crawler', 'serial': f'SN{i}'},
+                'timestamp_utc': f'2024-01-{i % 28 + 1:02d}T00:00:00Z'
+            }
+
+
+class TestHotTier(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.snapshot = os.path.join(self.tmpdir, 'snapshot.jsonl')
+        self.processor = FakeProcessor()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_tier(self, budget_bytes=1024 * 1024):
+        return InspectionHotTier(self.processor, budget_bytes=budget_bytes, snapshot_path=self.snapshot)
+
+    def expected_ids(self, filename):
+        return [f'{filename}{i}' for i in range(self.processor.records_per_file)]
+
+    def ids(self, tier, filename):
+        return [record.id for record in tier.stream(filename)]
+
+    def saved_tier(self, budget_bytes=1024 * 1024):
+        tier = self.make_tier(budget_bytes)
+        for filename in self.processor.files:
+            list(tier.stream(filename))
+        tier.save_snapshot()
+        return tier
+
+    def rewrite_snapshot(self, edit):
+        with open(self.snapshot) as f:
+            lines = f.read().splitlines()
+        with open(self.snapshot, 'w') as f:
+            f.write('\n'.join(edit(lines)) + '\n')
+
+    def test_stream_matches_source_cold_and_cached(self):
+        tier = self.make_tier()
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+        stats = tier.stats()
+        self.assertEqual(stats['misses'], 10)
+        self.assertEqual(stats['hits'], 10)
+
+    def test_partial_cache_reads_through_without_gaps(self):
+        tier = self.make_tier()
+        for _, _ in zip(tier.stream('a'), range(4)):
+            pass
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+
+    def test_snapshot_round_trip(self):
+        tier = self.saved_tier()
+        restored = self.make_tier()
+        self.assertEqual(restored.prewarm(), 20)
+        for filename in self.processor.files:
+            self.assertEqual(
+                [r.to_dict() for r in restored._prefixes[filename]],
+                [r.to_dict() for r in tier._prefixes[filename]]
+            )
+            self.assertEqual(self.ids(restored, filename), self.expected_ids(filename))
+        self.assertIsNotNone(restored.stats()['raw_dict_bytes_per_record'])
+        self.assertIsNotNone(restored.stats()['field_dict_bytes_per_record'])
+
+    def test_outdated_header_discards_snapshot(self):
+        self.saved_tier()
+        self.rewrite_snapshot(lambda lines: [json.dumps({'snapshot_version': SNAPSHOT_VERSION - 1})] + lines[1:])
+        tier = self.make_tier()
+        self.assertEqual(tier.prewarm(), 0)
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+
+    def test_corrupt_line_stops_that_file_only(self):
+        self.saved_tier()
+        # Line 0 is the header, so line 2 is record a1
+        self.rewrite_snapshot(lambda lines: lines[:2] + ['{"file": "a", "id": "a1"'] + lines[3:])
+        tier = self.make_tier()
+        tier.prewarm()
+        self.assertEqual(len(tier._prefixes['a']), 1)
+        self.assertEqual(len(tier._prefixes['b']), 10)
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+
+    def test_unexpected_fields_stop_that_file(self):
+        self.saved_tier()
+        self.rewrite_snapshot(lambda lines: lines[:3] + ['{"file": "a", "position": 2, "id": "a2"}'] + lines[4:])
+        tier = self.make_tier()
+        tier.prewarm()
+        self.assertEqual(len(tier._prefixes['a']), 2)
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+
+    def test_budget_rejection_during_prewarm_keeps_prefix_contiguous(self):
+        self.saved_tier()
+        tier = self.make_tier(budget_bytes=2000)
+        loaded = tier.prewarm()
+        self.assertEqual(loaded, sum(len(prefix) for prefix in tier._prefixes.values()))
+        self.assertLess(loaded, 20)
+        for filename in self.processor.files:
+            self.assertEqual(self.ids(tier, filename), self.expected_ids(filename))
+
+    def test_budget_is_respected_without_evicting_new_records(self):
+        tier = self.make_tier(budget_bytes=2000)
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+        stats = tier.stats()
+        self.assertLessEqual(stats['used_bytes'], 2000)
+        self.assertEqual(stats['evictions'], 0)
+        self.assertGreater(stats['rejected'], 0)
+
+    def test_scan_of_one_file_keeps_other_files_share(self):
+        tier = self.make_tier(budget_bytes=2000)
+        list(tier.stream('a'))
+        list(tier.stream('b'))
+        stats = tier.stats()
+        self.assertLessEqual(stats['used_bytes'], 2000)
+        self.assertGreater(stats['records_per_file']['a'], 0)
+        self.assertGreater(stats['records_per_file']['b'], 0)
+        self.assertLessEqual(tier._file_bytes['b'], tier.file_budget_bytes)
+        self.assertEqual(sum(tier._file_bytes.values()), stats['used_bytes'])
+        self.assertEqual(self.ids(tier, 'a'), self.expected_ids('a'))
+
+    def test_pool_empties_when_all_records_evicted(self):
+        tier = self.make_tier()
+        for filename in self.processor.files:
+            list(tier.stream(filename))
+        refs = sum(entry[1] for entry in tier._pool.values())
+        self.assertEqual(refs, len(InspectionRecord.POOLED_FIELDS) * 20)
+
+        with tier._lock:
+            for filename in self.processor.files:
+                while tier._prefixes[filename]:
+                    tier._evict_tail(filename)
+        self.assertEqual(tier._pool, {})
+        self.assertEqual(tier._pool_bytes, 0)
+        self.assertEqual(tier._record_bytes, 0)
+        self.assertEqual(tier._file_bytes, {'a': 0, 'b': 0})
+
+    def test_invalid_budget_env_falls_back_to_default(self):
+        os.environ['HOT_TIER_BUDGET_MB'] = '64MB'
+        try:
+            tier = InspectionHotTier(self.processor, snapshot_path=self.snapshot)
+        finally:
+            del os.environ['HOT_TIER_BUDGET_MB']
+        self.assertEqual(tier.budget_bytes, 64 * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()